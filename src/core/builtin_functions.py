@@ -29,6 +29,10 @@ from . import lexer
 
 class BuiltinFunctions:
     """ Builtin functions """
+    def run_pass(self, op: dict):
+        """ Does nothing (pass, and the block keywords that are handled by the parser) """
+        pass
+
     def run_endfunc(self, op: dict):
         """ Closes the functon declaration block """
         if self.current_func:
@@ -40,9 +44,8 @@ class BuiltinFunctions:
         """ Changes program current step to a specify label """
         self.require_one_argument(op, 'goto function requires label name argument')
         arg = op['args'][0]
-        try:
-            label_index = self.labels[arg]
-        except KeyError:
+        label_index = self.labels.get(arg)
+        if label_index is None:
             return self.raise_error('LabelError', 'undefined label "' + str(arg) + '"', op)
         self.frames[-1]['current_step'] = label_index-1
 
@@ -50,20 +53,34 @@ class BuiltinFunctions:
         """ Changes program current step to a specify label IF mem is True """
         self.require_one_argument(op, 'gotoif function requires label name argument')
         arg = op['args'][0]
-        try:
-            label_index = self.labels[arg]
-        except KeyError:
+        label_index = self.labels.get(arg)
+        if label_index is None:
             return self.raise_error('LabelError', 'undefined label "' + str(arg) + '"', op)
         if self.mem:
             self.frames[-1]['current_step'] = label_index-1
 
+    def run_mem_gotoif(self, op: dict):
+        """ Runs a `mem` command and the `gotoif` command after that at once
+
+        The parser generates this pair of commands for the if statements.
+        The `mem` is set directly instead of calling the `mem` function,
+        then the `gotoif` command is run and skipped.
+        """
+        frame = self.frames[-1]
+        step = frame['current_step']
+        self.mem = self.eval(op['args_eval'])
+        # an error in the condition that is handled by `try` moves to another step
+        # (maybe in another frame), then the `gotoif` should not be run
+        if self.frames[-1] is not frame or frame['current_step'] != step:
+            return
+        frame['current_step'] += 1
+        self.run_gotoif(frame['commands'][frame['current_step']])
+
     def run_try(self, op: dict):
         """ Starts the try-endtry block """
         self.require_one_argument(op, 'try command requires label name argument')
         arg = op['args'][0]
-        try:
-            self.labels[arg]
-        except KeyError:
+        if arg not in self.labels:
             return self.raise_error('LabelError', 'undefined label "' + str(arg) + '"', op)
         self.try_endtry.append(arg)
 
@@ -90,18 +107,9 @@ class BuiltinFunctions:
         if self.namespaces_tree:
             # delete unused variables before end namespace
             current_namespace = self.current_namespace()
-            try:
-                del self.all_vars()[current_namespace + '__dir__']
-            except KeyError:
-                pass
-            try:
-                del self.all_vars()[current_namespace + '__file__']
-            except KeyError:
-                pass
-            try:
-                del self.all_vars()[current_namespace + '__ismain__']
-            except KeyError:
-                pass
+            self.all_vars().pop(current_namespace + '__dir__', None)
+            self.all_vars().pop(current_namespace + '__file__', None)
+            self.all_vars().pop(current_namespace + '__ismain__', None)
 
             self.namespaces_tree.pop()
         else:
@@ -144,23 +152,9 @@ class BuiltinFunctions:
         # check parent exists
         parent_real_name = None
         if parent != None:
-            try:
-                parent_obj = self.classes[self.current_namespace() + parent]
-                parent_real_name = self.current_namespace() + parent
-            except KeyError:
-                parent_obj = None
-                for used_namespace in self.frames[-1]['used_namespaces']:
-                    try:
-                        parent_obj = self.classes[used_namespace + '.' + parent]
-                        parent_real_name = used_namespace + '.' + parent
-                    except KeyError:
-                        pass
-                if not parent_obj:
-                    try:
-                        parent_obj = self.classes[parent]
-                        parent_real_name = parent
-                    except KeyError:
-                        return self.raise_error('ClassError', 'undefined class "' + parent + '"', op)
+            parent_real_name = self.get_class_real_name(parent)
+            if not parent_real_name:
+                return self.raise_error('ClassError', 'undefined class "' + parent + '"', op)
         if parent_real_name != None:
             self.classes[self.current_namespace() + arg] = Class(self.current_namespace() + arg)
             self.classes[self.current_namespace() + arg].__props__['__parent__'] = parent_real_name
@@ -296,41 +290,57 @@ class BuiltinFunctions:
         if condition_result:
             return
         # condition is not True, loop should be breaked
-        i = self.frames[-1]['current_step']+1
-        loop_depth = 0
-        while i < len(self.frames[-1]['commands']):
-            if self.frames[-1]['commands'][i]['command'] == 'while':
-                loop_depth += 1
-            elif self.frames[-1]['commands'][i]['command'] == 'endwhile':
-                if loop_depth > 0:
-                    loop_depth -= 1
-                else:
-                    self.frames[-1]['current_step'] = i
-                    return
-            i += 1
+        current_step = self.frames[-1]['current_step']
+        end_index = self.frames[-1]['loop_jumps'].get(current_step)
+        if end_index is None:
+            # find the endwhile of this loop (only once for each command of the frame)
+            i = current_step+1
+            loop_depth = 0
+            while i < len(self.frames[-1]['commands']):
+                if self.frames[-1]['commands'][i]['command'] == 'while':
+                    loop_depth += 1
+                elif self.frames[-1]['commands'][i]['command'] == 'endwhile':
+                    if loop_depth > 0:
+                        loop_depth -= 1
+                    else:
+                        end_index = i
+                        break
+                i += 1
+            if end_index is None:
+                return
+            self.frames[-1]['loop_jumps'][current_step] = end_index
+        self.frames[-1]['current_step'] = end_index
 
     def run_endwhile(self, op: dict):
         """ The While block end """
         # Back to first of loop
-        i = self.frames[-1]['current_step']-1
-        loop_depth = 0
-        while i >= 0:
-            if self.frames[-1]['commands'][i]['command'] == 'endwhile':
-                loop_depth += 1
-            elif self.frames[-1]['commands'][i]['command'] == 'while':
-                if loop_depth > 0:
-                    loop_depth -=1
-                else:
-                    self.frames[-1]['current_step'] = i-1
-                    return
-            i -= 1
+        current_step = self.frames[-1]['current_step']
+        start_index = self.frames[-1]['loop_jumps'].get(current_step)
+        if start_index is None:
+            # find the while of this loop (only once for each command of the frame)
+            i = current_step-1
+            loop_depth = 0
+            while i >= 0:
+                if self.frames[-1]['commands'][i]['command'] == 'endwhile':
+                    loop_depth += 1
+                elif self.frames[-1]['commands'][i]['command'] == 'while':
+                    if loop_depth > 0:
+                        loop_depth -=1
+                    else:
+                        start_index = i
+                        break
+                i -= 1
+            if start_index is None:
+                return
+            self.frames[-1]['loop_jumps'][current_step] = start_index
+        self.frames[-1]['current_step'] = start_index-1
 
     def run_break(self, op: dict):
         """ Breaks the loop """
         tmp_op = dict(op)
-        op['args_str'] = 'False'
-        op['args_eval'] = [['n', 'False']]
-        self.run_while(op)
+        tmp_op['args_str'] = 'False'
+        tmp_op['args_eval'] = [['n', 'False']]
+        self.run_while(tmp_op)
 
     def run_continue(self, op: dict):
         """ Continues the loop """
@@ -53,16 +53,18 @@ class Class:
         for item in self.__inheritance_tree__:
             the_props.append(current_prog.classes[item].__props__)
             the_methods.append(current_prog.classes[item].__methods__)
-        class_copy = ClassObject(copy.deepcopy(the_props), copy.deepcopy(the_methods))
+        # each object needs its own method objects (to bind them to the object),
+        # but the method bodies are shared
+        the_methods = [
+            {name: copy.copy(method) for name, method in methods.items()}
+            for methods in the_methods
+        ]
+        class_copy = ClassObject(copy.deepcopy(the_props), the_methods)
         class_copy.__theclass__ = self
         class_copy.__name__
         class_copy.__inheritance_tree__ = self.__inheritance_tree__
-        tmp_is_in_class = False
-        try:
-            tmp_is_in_class = copy.deepcopy(current_prog.current_class)
-            current_prog.current_class = []
-        except:
-            pass
+        tmp_is_in_class = current_prog.current_class
+        current_prog.current_class = []
         if len(args) == 1:
             args = args[0]
         i = len(class_copy.__methods__)-1
@@ -80,7 +82,7 @@ class Class:
         return class_copy
 
     def __getattr__(self, attrname):
-        if attrname in ['__props__', '__methods__', '__inheritance_tree__', '__classname__']:
+        if attrname in {'__props__', '__methods__', '__inheritance_tree__', '__classname__'}:
             return super().__getattr__(attrname)
         try:
             return self.__props__[attrname]
@@ -91,7 +93,7 @@ class Class:
                 raise AttributeError(attrname)
 
     def __setattr__(self, attrname, value):
-        if attrname in ['__props__', '__methods__', '__inheritance_tree__', '__classname__']:
+        if attrname in {'__props__', '__methods__', '__inheritance_tree__', '__classname__'}:
             return super().__setattr__(attrname, value)
         self.__props__[attrname] = value
 
@@ -108,7 +110,7 @@ class ClassPropAndMethodCollection:
         self.__props__ = args[1]
 
     def __getattr__(self, attrname):
-        if attrname in ['__props__', '__methods__']:
+        if attrname in {'__props__', '__methods__'}:
             return super().__getattr__(attrname)
         try:
             return self.__props__[attrname]
@@ -119,7 +121,7 @@ class ClassPropAndMethodCollection:
                 raise AttributeError(attrname)
 
     def __setattr__(self, attrname, value):
-        if attrname in ['__props__', '__methods__']:
+        if attrname in {'__props__', '__methods__'}:
             return super().__setattr__(attrname, value)
         self.__props__[attrname] = value
 
@@ -178,7 +180,7 @@ class ClassObject:
 
     def __getattr__(self, attrname):
         from .current_prog import current_prog
-        if attrname in ['__props__', '__methods__', '__theclass__', '__inheritance_tree__']:
+        if attrname in {'__props__', '__methods__', '__theclass__', '__inheritance_tree__'}:
             return super().__getattr__(attrname)
         try:
             i = len(self.__props__)-1
@@ -201,7 +203,7 @@ class ClassObject:
                 raise AttributeError(attrname)
 
     def __setattr__(self, attrname, value):
-        if attrname in ['__props__', '__methods__', '__theclass__', '__inheritance_tree__']:
+        if attrname in {'__props__', '__methods__', '__theclass__', '__inheritance_tree__'}:
             return super().__setattr__(attrname, value)
         try:
             self.__props__[-1][attrname]
@@ -22,17 +22,18 @@
 
 """ Pashmak function system """
 
-import copy
 from . import parser
 
 class Function:
     """ the pashmak function object """
-    BUILTIN_WITHOUT_FRAME_ISOLATION_FUNCTIONS = ['import', 'import_once', 'import_run', 'import_run_once', 'mem', 'python', 'rmem', 'eval', 'debug']
+    BUILTIN_WITHOUT_FRAME_ISOLATION_FUNCTIONS = {'import', 'import_once', 'import_run', 'import_run_once', 'mem', 'python', 'rmem', 'eval', 'debug'}
     def __init__(self, name):
         self.name = name
         self.body = []
         self.args = []
         self.return_type = None
+        self.parent_object = None # the object that this function is a method of
+        self.namespace_op = None # the parsed `use <namespace>` command put before the body (False for global functions)
 
     def __validate_argument_type__(self, value, arg_type_full: str) -> bool:
         """ Gets a object and type defination string and validates object type """
@@ -83,23 +84,18 @@ class Function:
             if len(tmp_args) == 1:
                 if type(tmp_args[0]) == tuple:
                     tmp_args = list(tmp_args[0])
-        tmp_is_in_class = False
-        try:
-            tmp_is_in_class = copy.deepcopy(current_prog.current_class)
-            current_prog.current_class = []
-        except:
-            pass
+        # the body runs outside of the class declaration block (if any)
+        tmp_is_in_class = current_prog.current_class
+        current_prog.current_class = []
         current_prog.mem = args
         if len(current_prog.mem) == 1:
             current_prog.mem = current_prog.mem[0]
         default_vars = {}
         with_frame = True
-        try:
-            self.parent_object
+        if self.parent_object is not None:
             default_vars['this'] = self.parent_object
-        except:
-            if self.name in self.BUILTIN_WITHOUT_FRAME_ISOLATION_FUNCTIONS:
-                with_frame = False
+        elif self.name in self.BUILTIN_WITHOUT_FRAME_ISOLATION_FUNCTIONS:
+            with_frame = False
 
         # handle arguments
         if self.args:
@@ -145,14 +141,21 @@ class Function:
                             current_prog.raise_error('InvalidArgument', 'invalid argument type passed to "' + self.name + '" as "' + arg_name + '", it should be ' + arg_type + ', but ' + what_given + ' given')
                             return
 
-        tmp_body = copy.deepcopy(self.body)
-        tmp_func_parts = self.name.split('.')
-        if len(tmp_func_parts) > 1:
-            func_namespace = ''
-            for part in tmp_func_parts[:-1]:
-                func_namespace += part + '.'
-            func_namespace = func_namespace.strip('.')
-            tmp_body.insert(0, parser.parse('use ' + func_namespace)[0])
+        if self.namespace_op is None:
+            self.namespace_op = False
+            tmp_func_parts = self.name.split('.')
+            if len(tmp_func_parts) > 1:
+                func_namespace = ''
+                for part in tmp_func_parts[:-1]:
+                    func_namespace += part + '.'
+                func_namespace = func_namespace.strip('.')
+                self.namespace_op = parser.parse('use ' + func_namespace)[0]
+        # the commands are not changed while running, so they are shared
+        if self.namespace_op:
+            # the namespace of the function is used in the body
+            tmp_body = [self.namespace_op, *self.body]
+        else:
+            tmp_body = list(self.body)
         current_prog.exec_func(tmp_body, with_frame, default_vars)
         if tmp_is_in_class:
             current_prog.current_class = tmp_is_in_class
@@ -61,21 +61,13 @@ class Helpers(builtin_functions.BuiltinFunctions):
 
     def variable_exists(self, varname: str) -> bool:
         """ Checks a variable is exists or not """
-        try:
-            self.all_vars()[self.current_namespace() + varname]
+        all_vars = self.frames[-1]['vars']
+        if self.current_namespace() + varname in all_vars:
             return True
-        except KeyError:
-            for used_namespace in self.frames[-1]['used_namespaces']:
-                try:
-                    self.all_vars()[used_namespace + '.' + varname]
-                    return True
-                except KeyError:
-                    pass
-            try:
-                self.all_vars()[varname]
+        for used_namespace in self.frames[-1]['used_namespaces']:
+            if used_namespace + '.' + varname in all_vars:
                 return True
-            except KeyError:
-                return False
+        return varname in all_vars
 
     def variable_required(self, varname: str):
         """ Raises variable error if variable not exists """
@@ -88,42 +80,37 @@ class Helpers(builtin_functions.BuiltinFunctions):
 
     def get_var(self, varname: str, do_not_raise_error=False):
         """ Gets a variable name and returns value of that """
-        for frame in [self.frames[-1], self.frames[0]]:
-            try:
-                return frame['vars'][self.current_namespace() + varname]
-            except KeyError:
-                for used_namespace in self.frames[-1]['used_namespaces']:
-                    try:
-                        return frame['vars'][used_namespace + '.' + varname]
-                    except KeyError:
-                        pass
+        # variables of the function frames are chained to the global variables,
+        # so the variables of the last frame include the globals
+        # (same as all_vars(), read directly because this runs for every variable)
+        all_vars = self.frames[-1]['vars']
+        try:
+            return all_vars[self.current_namespace() + varname]
+        except KeyError:
+            for used_namespace in self.frames[-1]['used_namespaces']:
                 try:
-                    return frame['vars'][varname]
+                    return all_vars[used_namespace + '.' + varname]
                 except KeyError:
-                    do_raise_error = False
-                    try:
-                        op = self.frames[-1]['commands'][self.frames[-1]['current_step']]
-                        do_raise_error = True
-                    except:
-                        pass
-        if do_raise_error and do_not_raise_error == False:
+                    pass
+            try:
+                return all_vars[varname]
+            except KeyError:
+                pass
+        # raise the error only while a command is running
+        if do_not_raise_error == False and self.frames[-1]['current_step'] < len(self.frames[-1]['commands']):
             raise VariableError('undefined variable "' + varname + '"')
-            return
 
     def set_var(self, varname: str, value):
         """ Gets name of a variable and sets value on that """
+        frame = self.frames[-1]
+        full_name = self.current_namespace() + varname
         if '&' in varname:
-            do_raise_error = False
-            try:
-                if self.all_vars()[self.current_namespace() + varname] != None:
-                    op = self.frames[-1]['commands'][self.frames[-1]['current_step']]
-                    do_raise_error = True
-            except:
-                pass
-            if do_raise_error:
+            if frame['vars'].get(full_name) != None \
+                    and frame['current_step'] < len(frame['commands']):
+                op = frame['commands'][frame['current_step']]
                 self.raise_error('ConstError', '"' + varname + '" is a const and you cannot change that value', op)
                 return
-        self.all_vars()[self.current_namespace() + varname] = value
+        frame['vars'][full_name] = value
 
     def all_vars(self):
         """ Returns list of all of variables """
@@ -154,11 +141,8 @@ class Helpers(builtin_functions.BuiltinFunctions):
 
     def run_shutdown_events(self):
         """ Runs the shutdown events """
-        try:
-            self.shutdown_events_done
+        if hasattr(self, 'shutdown_events_done'):
             return
-        except:
-            pass
 
         # run shutdown events
         for ev in self.shutdown_event:
@@ -188,10 +172,10 @@ class Helpers(builtin_functions.BuiltinFunctions):
 
     def current_namespace(self):
         """ Returns current namespace """
-        namespace_prefix = ''
-        for ns in self.namespaces_tree:
-            namespace_prefix += ns + '.'
-        return namespace_prefix
+        # this is called for every variable and name lookup, and usually there is no namespace
+        if not self.namespaces_tree:
+            return ''
+        return '.'.join(self.namespaces_tree) + '.'
 
     def signal_handler(self, signal_code, frame):
         """ Raise error when signal exception raised """
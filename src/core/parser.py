@@ -186,12 +186,23 @@ def parse(content: str, filepath='<system>', only_parse=False, no_random=False)
         i += 1
 
     # handle the if statement
+    # the generated commands are collected in a new list in one pass,
+    # because inserting them into the middle of `commands` copies the rest of the list each time
     open_ifs = []
     open_ifs_counters = []
+    new_commands = []
     i = 0
-    while i < len(commands):
+    while i < len(commands) or open_ifs:
+        if i < len(commands):
+            command = commands[i]
+        else:
+            # close the unclosed if blocks at end of the code
+            command = parse_op('endif', file_path='<system>', line_number=len(new_commands)-1)
+        new_commands.append(command)
+        line_number = len(new_commands)-1
+        generated_commands = []
         try:
-            if commands[i]['command'] == 'if':
+            if command['command'] == 'if':
                 # init new if block
                 if no_random:
                     global rand_counter
@@ -202,30 +213,35 @@ def parse(content: str, filepath='<system>', only_parse=False, no_random=False)
                 open_ifs.append('tmplabelif' + rand_name)
                 open_ifs_counters.append(2)
 
-                commands.insert(i+1, parse_op('mem not (' + commands[i]['args_str'] + ')', file_path='<system>', line_number=i))
-                commands.insert(i+2, parse_op('gotoif ' + open_ifs[-1] + str(open_ifs_counters[-1]), file_path='<system>', line_number=i))
-            elif commands[i]['command'] == 'elif' or commands[i]['command'] == 'else':
-                cond = commands[i]['args_str']
-                if commands[i]['command'] == 'else':
+                generated_commands = [
+                    parse_op('mem not (' + command['args_str'] + ')', file_path='<system>', line_number=line_number),
+                    parse_op('gotoif ' + open_ifs[-1] + str(open_ifs_counters[-1]), file_path='<system>', line_number=line_number),
+                ]
+            elif command['command'] == 'elif' or command['command'] == 'else':
+                cond = command['args_str']
+                if command['command'] == 'else':
                     cond = 'True'
-                commands.insert(i+1, parse_op('goto ' + open_ifs[-1] + 'end', file_path='<system>', line_number=i))
-                commands.insert(i+2, parse_op('label ' + open_ifs[-1] + str(open_ifs_counters[-1]), file_path='<system>', line_number=i))
-                commands.insert(i+3, parse_op('mem not (' + cond + ')', file_path='<system>', line_number=i))
-                commands.insert(i+4, parse_op('gotoif ' + open_ifs[-1] + str(open_ifs_counters[-1]+1), file_path='<system>', line_number=i))
+                generated_commands = [
+                    parse_op('goto ' + open_ifs[-1] + 'end', file_path='<system>', line_number=line_number),
+                    parse_op('label ' + open_ifs[-1] + str(open_ifs_counters[-1]), file_path='<system>', line_number=line_number),
+                    parse_op('mem not (' + cond + ')', file_path='<system>', line_number=line_number),
+                    parse_op('gotoif ' + open_ifs[-1] + str(open_ifs_counters[-1]+1), file_path='<system>', line_number=line_number),
+                ]
                 open_ifs_counters[-1] += 1
-            elif commands[i]['command'] == 'endif':
-                commands.insert(i+1, parse_op('label ' + open_ifs[-1] + str(open_ifs_counters[-1]), file_path='<system>', line_number=i))
-                commands.insert(i+2, parse_op('label ' + open_ifs[-1] + 'end', file_path='<system>', line_number=i))
+            elif command['command'] == 'endif':
+                generated_commands = [
+                    parse_op('label ' + open_ifs[-1] + str(open_ifs_counters[-1]), file_path='<system>', line_number=line_number),
+                    parse_op('label ' + open_ifs[-1] + 'end', file_path='<system>', line_number=line_number),
+                ]
                 open_ifs.pop()
                 open_ifs_counters.pop()
-        except:
+        except IndexError:
+            # elif/else/endif without an opened if block
             pass
-
-        if i == len(commands)-1 and open_ifs and open_ifs_counters:
-            commands.insert(i+1, parse_op('endif', file_path='<system>', line_number=i))
+        new_commands += generated_commands
         i += 1
 
-    return commands
+    return new_commands
 
 def split_by_equals(string: str) -> list:
     """ Parses `<something> = <something>`
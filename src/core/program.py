@@ -26,6 +26,7 @@ import sys
 import os
 import signal
 import copy
+from collections import ChainMap
 from pathlib import Path
 from . import helpers, version, modules, jit, parser, current_prog, lexer
 from .class_system import Class, ClassObject
@@ -37,19 +38,30 @@ import math, pprint, subprocess, sqlite3, sqlite3.dump, sqlite3.dbapi2
 import urllib, urllib.error, urllib.parse, urllib.request, urllib.response
 import urllib.robotparser, platform, mimetypes, re, pickle, io
 
+# the `pass` command put in place of the labels (commands are not changed while running,
+# so one parsed command is shared)
+PASS_OP = parser.parse('pass', filepath='<system>')[0]
+
+# maximum number of items in each cache of the evaluated codes. the codes can be
+# made at runtime (e.g. by `eval`), so the oldest item is removed when a cache is full
+CACHE_SIZE = 4096
+
+def cache_set(cache: dict, key, value):
+    """ Puts a value in a cache and removes the oldest item if the cache is full """
+    if len(cache) >= CACHE_SIZE:
+        del cache[next(iter(cache))]
+    cache[key] = value
+
 def free(name):
     from . import current_prog
-    try:
-        del current_prog.current_prog.all_vars()[name]
-    except KeyError:
-        pass
+    current_prog.current_prog.all_vars().pop(name, None)
 
 class Program(helpers.Helpers):
     """ Pashmak program object """
     def __init__(self, is_test=False, args=[]):
         self.frames = [{
             'current_step': 0,
-            'commands': [parser.parse('pass')[0]],
+            'commands': [PASS_OP],
             'used_namespaces': [],
             'imported_modules': [],
             'vars': {
@@ -93,6 +105,38 @@ class Program(helpers.Helpers):
 
         self.defines = {}
 
+        self.lexed_evals = {} # lexer output of evaluated codes <code>:<lexer.parse_eval-output>
+        self.equals_splits = {} # commands splited by `=` <command-string>:<parser.split_by_equals-output>
+        self.compiled_evals = {} # compiled python code of evaluated expressions <python-code>:<code-object>
+
+        # builtin commands <command-name>:<handler>
+        self.commands_dict = {
+            'func': self.run_func,
+            'goto': self.run_goto,
+            'gotoif': self.run_gotoif,
+            'try': self.run_try,
+            'endtry': self.run_endtry,
+            'namespace': self.run_namespace,
+            'ns': self.run_namespace,
+            'endnamespace': self.run_endnamespace,
+            'endns': self.run_endnamespace,
+            'use': self.run_use,
+            'class': self.run_class,
+            'endclass': self.run_endclass,
+            'return': self.run_return,
+            'while': self.run_while,
+            'endwhile': self.run_endwhile,
+            'break': self.run_break,
+            'continue': self.run_continue,
+            '@doc': self.run_atdoc,
+            'pass': self.run_pass,
+            'if': self.run_pass,
+            'elif': self.run_pass,
+            'else': self.run_pass,
+            'endif': self.run_pass,
+            'end': self.run_pass,
+        }
+
         current_prog.current_prog = self
 
     def import_script(self, paths, import_once=False, ismain_default=False):
@@ -110,44 +154,40 @@ class Program(helpers.Helpers):
             if path[0] == '@':
                 code_location = path
                 module_name = path[1:]
-                try:
-                    namespaces_prefix = self.current_namespace()
-                    namespaces_prefix += '@'
-                    is_currently_imported = False
-                    z = len(self.frames)-1
-                    while z >= 0:
-                        if namespaces_prefix + module_name in self.frames[z]['imported_modules']:
-                            is_currently_imported = True
-                            z = -1
-                        z -= 1
-                    if not is_currently_imported:
-                        try:
-                            # search modules from builtin modules
-                            commands = [parser.parse('$__ismain__ = ' + str(ismain_default),
-                                                     filepath='@' + module_name)[0], 
-                                                    *modules.modules[module_name],
-                                                     parser.parse('$__ismain__ = ' + str(self.get_var('__ismain__')),
-                                                     filepath='@' + module_name)[0]]
-                        except KeyError:
-                            # find modules from path
-                            commands = False
-                            for path in self.module_path:
-                                path = os.path.abspath(path)
-                                full_path = path + '/' + module_name.replace('.', '/')
-                                full_path = os.path.abspath(full_path)
-                                if os.path.isfile(full_path + '.pashm'):
-                                    commands = jit.load(os.path.abspath(full_path + '.pashm'), os.path.abspath(full_path + '.pashm'), self, ismain_default=ismain_default)
-                                elif os.path.isdir(full_path):
-                                    if os.path.isfile(os.path.abspath(full_path + '/__init__.pashm')):
-                                        commands = jit.load(os.path.abspath(full_path + '/__init__.pashm'), os.path.abspath(full_path + '/__init__.pashm'), self, ismain_default=ismain_default)
-                            if commands == False:
-                                raise KeyError()
-                        # add this module to imported modules
-                        self.frames[-1]['imported_modules'].append(namespaces_prefix + module_name)
-                    else:
-                        return
-                except KeyError:
-                    return self.raise_error('ModuleError', 'undefined module "' + module_name + '"', op)
+                namespaces_prefix = self.current_namespace()
+                namespaces_prefix += '@'
+                is_currently_imported = False
+                z = len(self.frames)-1
+                while z >= 0:
+                    if namespaces_prefix + module_name in self.frames[z]['imported_modules']:
+                        is_currently_imported = True
+                        z = -1
+                    z -= 1
+                if is_currently_imported:
+                    return
+                if module_name in modules.modules:
+                    # search modules from builtin modules
+                    commands = [parser.parse('$__ismain__ = ' + str(ismain_default),
+                                             filepath='@' + module_name)[0],
+                                *modules.modules[module_name],
+                                parser.parse('$__ismain__ = ' + str(self.get_var('__ismain__')),
+                                             filepath='@' + module_name)[0]]
+                else:
+                    # find modules from path
+                    commands = False
+                    for path in self.module_path:
+                        path = os.path.abspath(path)
+                        full_path = path + '/' + module_name.replace('.', '/')
+                        full_path = os.path.abspath(full_path)
+                        if os.path.isfile(full_path + '.pashm'):
+                            commands = jit.load(os.path.abspath(full_path + '.pashm'), os.path.abspath(full_path + '.pashm'), self, ismain_default=ismain_default)
+                        elif os.path.isdir(full_path):
+                            if os.path.isfile(os.path.abspath(full_path + '/__init__.pashm')):
+                                commands = jit.load(os.path.abspath(full_path + '/__init__.pashm'), os.path.abspath(full_path + '/__init__.pashm'), self, ismain_default=ismain_default)
+                    if commands == False:
+                        return self.raise_error('ModuleError', 'undefined module "' + module_name + '"', op)
+                # add this module to imported modules
+                self.frames[-1]['imported_modules'].append(namespaces_prefix + module_name)
             else:
                 namespaces_prefix = self.current_namespace() + '@'
                 is_currently_imported = False
@@ -199,14 +239,11 @@ class Program(helpers.Helpers):
             self.try_endtry.pop()
             new_step = self.labels[str(label_index)]
             while True:
-                try:
-                    if self.frames[-1]['commands'][new_step-1]['command'] == 'pass':
-                        self.frames[-1]['current_step'] = new_step-1
-                        break
-                    else:
-                        self.frames.pop()
-                except:
-                    self.frames.pop()
+                commands = self.frames[-1]['commands']
+                if new_step-1 < len(commands) and commands[new_step-1]['command'] == 'pass':
+                    self.frames[-1]['current_step'] = new_step-1
+                    break
+                self.frames.pop()
 
             # put error data in mem
             self.mem = copy.deepcopy(self.classes['Error'])
@@ -224,43 +261,27 @@ class Program(helpers.Helpers):
             return
 
         # check HIDE_ERRORS config
-        hide_errors = False
-        try:
-            if self.defines['HIDE_ERRORS']:
-                hide_errors = True
-        except:
-            pass
+        hide_errors = bool(self.defines.get('HIDE_ERRORS'))
 
         # render error
         if not hide_errors:
-            try:
-                self.defines['WEB_INITED']
+            if 'WEB_INITED' in self.defines:
                 print('<pre style="background-color: #cdcdcd; padding: 10px; border-radius: 10px;">')
-            except:
-                pass
             print(error_type + ': ' + message + ':')
             last_frame = self.frames[0]
             for frame in self.frames[1:]:
-                try:
-                    if last_frame:
-                        tmp_op = last_frame['commands'][last_frame['current_step']]
-                    else:
-                        tmp_op = frame['commands'][0]
+                if last_frame['current_step'] < len(last_frame['commands']):
+                    tmp_op = last_frame['commands'][last_frame['current_step']]
                     print(
                         '  in ' + tmp_op['file_path'] + ':' + str(tmp_op['line_number'])\
                         + ':\n\t' + tmp_op['str']
                     )
-                except KeyError:
-                    pass
                 last_frame = frame
             print('  in ' + op['file_path'] + ':' + str(op['line_number']) + ':\n\t' + op['str'])
             if self.frames[1:]:
                 print(error_type + ': ' + message + '.')
-            try:
-                self.defines['WEB_INITED']
+            if 'WEB_INITED' in self.defines:
                 print('</pre>')
-            except:
-                pass
         sys.exit(1)
 
     def exec_func(self, func_body: list, with_frame=True, default_variables={}):
@@ -269,9 +290,11 @@ class Program(helpers.Helpers):
         old_file = self.get_var('__file__')
         # create new frame for this call
         if with_frame:
-            frame_vars = dict(self.frames[0]['vars'])
-            for k in self.all_vars():
-                if k in ['argv', 'argc', '__file__', '__dir__', '__ismain__']:
+            # global variables are read through the chain instead of being copied for each call,
+            # the variables set in the function are kept in the first map
+            frame_vars = ChainMap({}, self.frames[0]['vars'])
+            for k in ('argv', 'argc', '__file__', '__dir__', '__ismain__'):
+                if k in self.all_vars():
                     frame_vars[k] = copy.deepcopy(self.get_var(k))
             imported_modules = []
         else:
@@ -303,74 +326,65 @@ class Program(helpers.Helpers):
 
     def get_func_real_name(self, name: str):
         """ Returns function real name """
+        current_namespace = self.current_namespace()
         real_name = False
-        try:
-            func_body = self.functions[self.current_namespace() + name]
-            real_name = self.current_namespace() + name
-        except KeyError:
-            func_body = False
+        if current_namespace + name in self.functions:
+            real_name = current_namespace + name
+        else:
             for used_namespace in self.frames[-1]['used_namespaces']:
-                try:
-                    func_body = self.functions[used_namespace + '.' + name]
+                if used_namespace + '.' + name in self.functions:
                     real_name = used_namespace + '.' + name
-                except KeyError:
-                    pass
-            if not func_body:
-                try:
-                    func_body = self.functions[name]
-                    real_name = name
-                except KeyError:
-                    real_name = False
+            if not real_name and name in self.functions:
+                real_name = name
         return real_name
 
     def get_class_real_name(self, name: str):
         """ Returns class real name """
+        current_namespace = self.current_namespace()
         real_name = False
-        try:
-            class_body = self.classes[self.current_namespace() + name]
-            real_name = self.current_namespace() + name
-        except KeyError:
-            class_body = False
+        if current_namespace + name in self.classes:
+            real_name = current_namespace + name
+        else:
             for used_namespace in self.frames[-1]['used_namespaces']:
-                try:
-                    class_body = self.classes[used_namespace + '.' + name]
+                if used_namespace + '.' + name in self.classes:
                     real_name = used_namespace + '.' + name
-                except KeyError:
-                    pass
-            if not class_body:
-                try:
-                    class_body = self.classes[name]
-                    real_name = name
-                except KeyError:
-                    real_name = False
+            if not real_name and name in self.classes:
+                real_name = name
         return real_name
 
     def eval(self, command, only_parse=False, dont_check_vars=False):
         """ Runs eval on command """
         if type(command) == str:
-            result = lexer.parse_eval(command)
-        else:
-            result = command
-
-        for i in range(0, len(result)):
-            if result[i][0] == 'o':
-                func_name = self.get_func_real_name(result[i][-1])
+            # the lexer output is cached for each code
+            lexed = self.lexed_evals.get(command)
+            if lexed is None:
+                lexed = lexer.parse_eval(command)
+                cache_set(self.lexed_evals, command, lexed)
+            command = lexed
+
+        # the names are resolved, the python code is built and the variables are checked
+        # in one pass over the tokens. the tokens are shared between calls (function bodies
+        # are not copied), so they are not changed
+        py_op = ''
+        for item in command:
+            item_type = item[0]
+            if item_type == 'o':
+                name = item[-1]
+                func_name = self.get_func_real_name(name)
                 if func_name != False:
-                    result[i][-1] = 'self.functions["' + func_name + '"]'
+                    name = 'self.functions["' + func_name + '"]'
                 else:
-                    class_name = self.get_class_real_name(result[i][-1])
+                    class_name = self.get_class_real_name(name)
                     if class_name != False:
-                        result[i][-1] = 'self.classes["' + class_name + '"]'
-                    else:
-                        try:
-                            self.defines[result[i][-1]]
-                            result[i][-1] = 'self.defines["' + result[i][-1] + '"]'
-                        except:
-                            pass
-
-        py_op = ''
-        for item in result:
-            if item[0] in ('n', 'o', 'v'):
+                        name = 'self.classes["' + class_name + '"]'
+                    elif name in self.defines:
+                        name = 'self.defines["' + name + '"]'
+                py_op += name + ' '
+            elif item_type == 'v':
+                if not only_parse:
+                    self.variable_required(item[1])
+                py_op += item[-1] + ' '
+            elif item_type == 'n':
                 py_op += item[-1] + ' '
             else:
                 py_op += item[-1]
@@ -378,19 +392,30 @@ class Program(helpers.Helpers):
         if only_parse:
             return py_op
 
-        for item in result:
-            if item[0] == 'v':
-                self.variable_required(item[1])
-
-        # set aliases
-        true = True
-        false = False
-        null = None
-        string = str
-        integer = int
-        array = list
+        # compile each generated python code only once
+        code = self.compiled_evals.get(py_op)
+        if code is None:
+            code = compile(py_op, '<string>', 'eval')
+            cache_set(self.compiled_evals, py_op, code)
+
+        # only the aliases and `self` are visible to the code (not the locals of this method)
+        return eval(code, globals(), {
+            'self': self,
+            'true': True,
+            'false': False,
+            'null': None,
+            'string': str,
+            'integer': int,
+            'array': list,
+        })
 
-        return eval(py_op)
+    def split_command_by_equals(self, op: dict) -> list:
+        """ Returns output of parser.split_by_equals for the command (cached by the command string) """
+        parts = self.equals_splits.get(op['str'])
+        if parts is None:
+            parts = parser.split_by_equals(op['str'].strip())
+            cache_set(self.equals_splits, op['str'], parts)
+        return parts
 
     def run(self, op: dict):
         """ Run once command """
@@ -415,49 +440,10 @@ class Program(helpers.Helpers):
                 self.functions[self.current_func[-1]].body.append(op)
             return
 
-        if op_name == 'endclass':
-            self.run_endclass(op)
-            return
-
-        # list of commands
-        commands_dict = {
-            'func': self.run_func,
-            'goto': self.run_goto,
-            'gotoif': self.run_gotoif,
-            'try': self.run_try,
-            'endtry': self.run_endtry,
-            'namespace': self.run_namespace,
-            'ns': self.run_namespace,
-            'endnamespace': self.run_endnamespace,
-            'endns': self.run_endnamespace,
-            'use': self.run_use,
-            'class': self.run_class,
-            'endclass': self.run_endclass,
-            'return': self.run_return,
-            'while': self.run_while,
-            'endwhile': self.run_endwhile,
-            'break': self.run_break,
-            'continue': self.run_continue,
-            '@doc': self.run_atdoc,
-            'pass': None,
-            'if': None,
-            'elif': None,
-            'else': None,
-            'endif': None,
-            'end': None,
-        }
-
-        # check op_name is a valid command
-        op_func = 0
-        try:
-            op_func = commands_dict[op_name]
-        except:
-            pass
-
-        # if op_name is a valid command, run the function
-        if op_func != 0:
-            if op_func != None:
-                op_func(op)
+        # if op_name is a builtin command, run the function
+        op_func = self.commands_dict.get(op_name)
+        if op_func is not None:
+            op_func(op)
             return
 
         if op['str'][0] == '$':
@@ -465,7 +451,7 @@ class Program(helpers.Helpers):
             is_in_class = False
             if self.current_class:
                 is_in_class = True
-            parts = parser.split_by_equals(op['strings'])
+            parts = self.split_command_by_equals(op)
             if len(parts) <= 1:
                 if '->' in op['str'] or '(' in op['str'] or ')' in op['str']:
                     self.mem = self.eval(op['eval'])
@@ -501,7 +487,7 @@ class Program(helpers.Helpers):
                         self.set_var(varname[1:], value)
             return
 
-        parts = parser.split_by_equals(op['strings'])
+        parts = self.split_command_by_equals(op)
         if len(parts) > 1:
             part1 = self.eval(parts[0], only_parse=True)
             part2 = self.eval(parts[1], only_parse=True)
@@ -515,39 +501,33 @@ class Program(helpers.Helpers):
             return
         func_body = self.functions[func_real_name]
 
-        # run function
-        try:
-            # execute function body
-            if op_name in Function.BUILTIN_WITHOUT_FRAME_ISOLATION_FUNCTIONS:
-                # put argument in the mem
-                if op['args_str'] != '' and op['args_str'].strip() != '()':
-                    if op['command'] == 'rmem':
-                        self.eval(op['args_eval'])
-                        return
-                    else:
-                        func_arg = self.eval(op['args_eval'])
+        # execute function body
+        if op_name in Function.BUILTIN_WITHOUT_FRAME_ISOLATION_FUNCTIONS:
+            # put argument in the mem
+            if op['args_str'] != '' and op['args_str'].strip() != '()':
+                if op['command'] == 'rmem':
+                    self.eval(op['args_eval'])
+                    return
                 else:
-                    func_arg = None
-                self.mem = func_arg
-                self.exec_func(func_body.body, False)
+                    func_arg = self.eval(op['args_eval'])
             else:
-                args_str = op['args_str'].strip()
-                if args_str:
-                    if args_str[0] != '(':
-                        args_str = '(' + args_str + ')'
-                else:
-                    args_str = '()'
+                func_arg = None
+            self.mem = func_arg
+            self.exec_func(func_body.body, False)
+        else:
+            args_str = op['args_str'].strip()
+            if args_str:
+                if args_str[0] != '(':
+                    args_str = '(' + args_str + ')'
+            else:
+                args_str = '()'
 
-                self.mem = self.eval(op['command'] + args_str)
-            return
-        except Exception as ex:
-            raise
+            self.mem = self.eval(op['command'] + args_str)
+        return
 
     def bootstrap_modules(self):
         """ Loads modules from module paths in environment variable """
-        try:
-            os.environ['PASHMAKPATH']
-        except:
+        if 'PASHMAKPATH' not in os.environ:
             os.environ['PASHMAKPATH'] = ''
         home_directory = str(Path.home())
         os.environ['PASHMAKPATH'] = '/usr/lib/pashmak_modules;' + home_directory + '/.local/lib/pashmak_modules;' + os.environ['PASHMAKPATH']
@@ -561,28 +541,51 @@ class Program(helpers.Helpers):
         is_in_func = False
         self.frames[-1]['current_step'] = 0
 
-        # load the labels
+        # load the labels and the handlers of the commands
+        # `handlers` keeps the function that runs each command (same index as `commands`),
+        # so the builtin commands are called directly without going through `run`
+        handlers = []
         i = 0
         while i < len(self.frames[-1]['commands']):
             current_op = self.frames[-1]['commands'][i]
+            handler = self.commands_dict.get(current_op['command'], self.run)
             if current_op['command'] == 'label':
                 if not is_in_func:
                     arg = current_op['args'][0]
                     self.labels[arg] = i+1
-                    self.frames[-1]['commands'][i] = parser.parse('pass', filepath='<system>')[0]
+                    self.frames[-1]['commands'][i] = PASS_OP
+                    handler = self.run_pass
             elif current_op['command'] == 'func':
                 is_in_func = True
+                # `run` keeps track of the nested function declarations
+                handler = self.run
             elif current_op['command'] == 'endfunc':
                 is_in_func = False
+            elif current_op['command'] == 'mem' and current_op['file_path'] == '<system>':
+                # the parser generates `mem not (<condition>)` + `gotoif <label>` for the if statements,
+                # run them as one command
+                if i+1 < len(self.frames[-1]['commands']):
+                    next_op = self.frames[-1]['commands'][i+1]
+                    if next_op['command'] == 'gotoif' and next_op['file_path'] == '<system>':
+                        handler = self.run_mem_gotoif
+            handlers.append(handler)
             i += 1
-
-        while self.frames[-1]['current_step'] < len(self.frames[-1]['commands']):
+        self.frames[-1]['handlers'] = handlers
+        # jumps of the while/endwhile/break/continue commands <command-index>:<target-index>,
+        # filled while the loops run
+        self.frames[-1]['loop_jumps'] = {}
+
+        frame = self.frames[-1]
+        while frame['current_step'] < len(frame['commands']):
+            op = frame['commands'][frame['current_step']]
             try:
-                self.run(self.frames[-1]['commands'][self.frames[-1]['current_step']])
+                if self.current_func:
+                    # the command should be appended to body of the declaring function
+                    self.run(op)
+                else:
+                    frame['handlers'][frame['current_step']](op)
             except Exception as ex:
-                try:
-                    self.frames[-1]['commands'][self.frames[-1]['current_step']]
-                except:
+                if self.frames[-1]['current_step'] >= len(self.frames[-1]['commands']):
                     break
                 if ex.__class__.__name__ == 'RecursionError':
                     msg = 'maximum recursion depth ' + str(len(self.frames)) + ' exceeded'
@@ -594,6 +597,8 @@ class Program(helpers.Helpers):
                     self.frames[-1]['commands'][self.frames[-1]['current_step']]
                 )
             self.frames[-1]['current_step'] += 1
+            # the command may have changed the frames (return, errors, exit...)
+            frame = self.frames[-1]
 
         if len(self.frames) > 1:
             self.frames.pop()